@@ -1,7 +1,6 @@
 from typing import TypedDict, Annotated, Literal
-from langgraph.graph import StateGraph, END
-from langchain_core.messages import HumanMessage
 import operator
+from sprint_scheduler import BATCH
 
 class AgentState(TypedDict):
     messages: Annotated[list, operator.add]
@@ -20,6 +19,8 @@ class MultiAgentSystem:
         self.graph = self._build_graph()
 
     def _build_graph(self):
+        from langgraph.graph import StateGraph, END
+
         workflow = StateGraph(AgentState)
         workflow.add_node("router", self._router)
         workflow.add_node("rag_agent", self._rag_agent)
@@ -55,29 +56,40 @@ class MultiAgentSystem:
         print(f"  Router: sending to {state['next_agent']}")
         return state
 
+    def _log(self, state, text):
+        from langchain_core.messages import HumanMessage
+        state["messages"].append(HumanMessage(content=text))
+
+    def _invoke_llm(self, prompt):
+        # Full analyses are background work; let interactive Q&A go first
+        scheduler = getattr(self.rag, "scheduler", None)
+        if scheduler:
+            return scheduler.run("llm", lambda: self.llm.invoke(prompt), BATCH, self.llm)
+        return self.llm.invoke(prompt)
+
     def _rag_agent(self, state):
         print("  RAG Agent: answering question...")
-        result = self.rag.ask(state["question"])
+        result = self.rag.ask(state["question"], priority=BATCH)
         state["rag_answer"] = result["answer"]
-        state["messages"].append(HumanMessage(content="RAG complete"))
+        self._log(state, "RAG complete")
         return state
 
     def _summarizer(self, state):
         print("  Summarizer: creating summary...")
-        response = self.llm.invoke(
+        response = self._invoke_llm(
             f"Summarize these contracts in 4 bullet points:\n\n{state['doc_content'][:3000]}"
         )
         state["summary"] = response.content
-        state["messages"].append(HumanMessage(content="Summary complete"))
+        self._log(state, "Summary complete")
         return state
 
     def _risk_analyzer(self, state):
         print("  Risk Analyzer: identifying risks...")
-        response = self.llm.invoke(
+        response = self._invoke_llm(
             f"List the top 3 risks in these contracts with severity (LOW/MEDIUM/HIGH/CRITICAL):\n\n{state['doc_content'][:3000]}"
         )
         state["risks"] = response.content
-        state["messages"].append(HumanMessage(content="Risk analysis complete"))
+        self._log(state, "Risk analysis complete")
         return state
 
     def _finalizer(self, state):
@@ -3,8 +3,12 @@ Enterprise Document Intelligence System
 Streamlit UI - Production Demo
 """
 import streamlit as st
+import os
 import time
 from pathlib import Path
+from sprint_bedrock import load_env
+from sprint_startup import prewarm
+from sprint_collections import slugify
 
 st.set_page_config(
     page_title="DocIntel · Enterprise AI",
@@ -13,6 +17,11 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Import LangChain/LangGraph/FAISS and open the Bedrock client while the user picks files
+load_env()
+if os.getenv("DOCINTEL_PREWARM", "1") != "0":
+    prewarm()
+
 st.markdown("""
 <style>
 @import url('https://fonts.googleapis.com/css2?family=Syne:wght@400;700;800&family=DM+Mono:wght@400;500&family=DM+Sans:wght@300;400;500&display=swap');
@@ -58,7 +67,7 @@ header[data-testid="stHeader"] { display: none; }
 """, unsafe_allow_html=True)
 
 # ── Session state ─────────────────────────────────────────────────────────
-for key in ["rag", "agents", "doc_content", "last_result", "chunk_count", "doc_count"]:
+for key in ["rag", "agents", "doc_content", "last_result", "chunk_count", "doc_count", "collection"]:
     if key not in st.session_state:
         st.session_state[key] = None
 if "docs_loaded" not in st.session_state:
@@ -74,6 +83,15 @@ with st.sidebar:
     <hr style="border-color:#1e2d45;margin:12px 0;">
     """, unsafe_allow_html=True)
 
+    st.markdown("**🗂️ Client / Matter**")
+    matter = st.text_input(
+        "Client or matter", placeholder="e.g. acme-2024-msa",
+        label_visibility="collapsed", disabled=st.session_state.docs_loaded
+    )
+    collection = slugify(matter)
+    if matter and not collection:
+        st.caption("⚠️ Use letters or numbers in the client/matter name.")
+
     st.markdown("**📁 Upload Documents**")
     uploaded_files = st.file_uploader(
         "Drop PDFs here", type=["pdf"],
@@ -83,35 +101,50 @@ with st.sidebar:
     st.markdown("<div style='height:8px'></div>", unsafe_allow_html=True)
 
     if uploaded_files and not st.session_state.docs_loaded:
-        if st.button("🚀  Process Documents", use_container_width=True):
+        if not collection:
+            st.caption("Enter a client/matter name to keep these documents separate from other clients.")
+        if st.button("🚀  Process Documents", use_container_width=True, disabled=not collection):
             with st.spinner("Initialising AI system..."):
                 try:
                     from sprint_bedrock import get_llm, get_embeddings
                     from sprint_rag import SimpleRAG
                     from sprint_agents import MultiAgentSystem
-
-                    save_dir = Path("./data/sample_contracts")
-                    save_dir.mkdir(parents=True, exist_ok=True)
-                    for f in uploaded_files:
-                        with open(save_dir / f.name, "wb") as out:
-                            out.write(f.getbuffer())
+                    from sprint_scheduler import get_scheduler
+                    from sprint_collections import get_store
 
                     llm = get_llm()
                     embeddings = get_embeddings()
-                    rag = SimpleRAG(llm, embeddings)
-                    docs = rag.load_documents(str(save_dir))
-                    chunks = rag.create_vector_store(docs)
+                    scheduler = get_scheduler()
+                    store = get_store(embeddings, scheduler)
+
+                    for f in uploaded_files:
+                        store.save_upload(collection, f.name, f.getbuffer())
+
+                    rag = SimpleRAG(
+                        llm, embeddings, scheduler=scheduler,
+                        store=store, collections=[collection]
+                    )
+                    docs = rag.load_documents(str(store.documents_dir(collection)))
+                    rag.create_vector_store(docs, collection)
+                    if not store.exists(collection) or store.load(collection).index.ntotal == 0:
+                        raise ValueError(
+                            "No text could be extracted from these PDFs (scanned or empty?)"
+                        )
                     rag.setup_qa_chain()
 
+                    # Counts cover the whole collection, including earlier uploads
+                    doc_count = len({d.metadata.get("source") for d in docs})
+
                     st.session_state.rag = rag
                     st.session_state.agents = MultiAgentSystem(llm, rag)
                     st.session_state.docs_loaded = True
-                    st.session_state.doc_count = len(uploaded_files)
-                    st.session_state.chunk_count = len(chunks)
+                    st.session_state.collection = collection
+                    st.session_state.doc_count = doc_count
+                    st.session_state.chunk_count = store.load(collection).index.ntotal
                     st.session_state.doc_content = "\n".join(
                         [d.page_content[:600] for d in docs[:6]]
                     )
-                    st.success(f"✅ {len(uploaded_files)} docs loaded!")
+                    st.success(f"✅ {doc_count} docs loaded!")
                     st.rerun()
                 except Exception as e:
                     st.error(f"Error: {e}")
@@ -121,6 +154,7 @@ with st.sidebar:
         <div style="background:rgba(16,185,129,0.1);border:1px solid #10b981;border-radius:10px;padding:14px 16px;margin-bottom:12px;">
             <div style="color:#10b981;font-family:'Syne',sans-serif;font-weight:700;font-size:12px;margin-bottom:6px;">✅ SYSTEM READY</div>
             <div style="color:#64748b;font-size:11px;font-family:'DM Mono',monospace;">
+                Matter: {st.session_state.collection}<br>
                 {st.session_state.doc_count} documents loaded<br>
                 {st.session_state.chunk_count} searchable chunks<br>
                 Claude 3 · Titan Embeddings · FAISS
@@ -128,7 +162,9 @@ with st.sidebar:
         </div>
         """, unsafe_allow_html=True)
         if st.button("🔄  Reset", use_container_width=True):
-            for k in ["rag","agents","docs_loaded","doc_content","last_result"]:
+            if st.session_state.rag:
+                st.session_state.rag.close()
+            for k in ["rag","agents","docs_loaded","doc_content","last_result","collection"]:
                 st.session_state[k] = None
             st.session_state.docs_loaded = False
             st.rerun()
@@ -1,29 +1,68 @@
-import boto3
-from langchain_aws import ChatBedrock, BedrockEmbeddings
-from dotenv import load_dotenv
 import os
+import threading
+
+LLM_MODEL_ID = "us.anthropic.claude-3-haiku-20240307-v1:0"
+EMBEDDING_MODEL_ID = "amazon.titan-embed-text-v1"
+
+_clients = {}
+_clients_lock = threading.Lock()
+_env_loaded = False
+_env_lock = threading.Lock()
+
+
+def load_env():
+    """Read .env once. Cheap - safe to call before any heavy import."""
+    global _env_loaded
+    with _env_lock:
+        if not _env_loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _env_loaded = True
+
+
+def get_client(service="bedrock-runtime", region=None):
+    """Shared, thread-safe boto3 client per (service, region) with keep-alive connections."""
+    with _clients_lock:
+        load_env()
+        region = region or os.getenv("AWS_REGION", "us-east-1")
+        key = (service, region)
+        if key not in _clients:
+            import boto3
+            from botocore.config import Config
+
+            _clients[key] = boto3.client(
+                service,
+                region_name=region,
+                config=Config(
+                    max_pool_connections=32,
+                    tcp_keepalive=True,
+                    connect_timeout=5,
+                    read_timeout=120,
+                    retries={"max_attempts": 4, "mode": "adaptive"}
+                )
+            )
+        return _clients[key]
 
-load_dotenv()
 
 def get_llm():
+    from langchain_aws import ChatBedrock
+
     return ChatBedrock(
-        model_id="us.anthropic.claude-3-haiku-20240307-v1:0",
-        client=boto3.client(
-            "bedrock-runtime",
-            region_name=os.getenv("AWS_REGION", "us-east-1")
-        ),
+        model_id=LLM_MODEL_ID,
+        client=get_client(),
         model_kwargs={"max_tokens": 4096, "temperature": 0.1}
     )
 
+
 def get_embeddings():
+    from langchain_aws import BedrockEmbeddings
+
     return BedrockEmbeddings(
-        model_id="amazon.titan-embed-text-v1",
-        client=boto3.client(
-            "bedrock-runtime",
-            region_name=os.getenv("AWS_REGION", "us-east-1")
-        )
+        model_id=EMBEDDING_MODEL_ID,
+        client=get_client()
     )
 
+
 if __name__ == "__main__":
     print("Testing Bedrock...")
     llm = get_llm()
@@ -31,4 +70,4 @@ if __name__ == "__main__":
     print("LLM works:", response.content)
     embeddings = get_embeddings()
     vec = embeddings.embed_query("test")
-    print("Embeddings work:", len(vec), "dimensions")
\ No newline at end of file
+    print("Embeddings work:", len(vec), "dimensions")
@@ -0,0 +1,349 @@
+"""Named collections (one per client/matter), each in its own FAISS shard.
+
+Layout on disk:
+
+    data/collections/<name>/documents/   uploaded PDFs
+    data/collections/<name>/faiss_db/    the shard's index
+
+Shards are loaded on demand and the least recently used ones are unloaded once
+the estimated memory of loaded shards goes over the budget. Shards being searched
+are pinned and never evicted mid-search. A search only ever touches the
+collections it is given, so one tenant never sees another's chunks.
+
+Loaded shards are never modified in place - indexing builds an updated copy and
+swaps it in, so concurrent searches always see a consistent index. On disk the
+copy is written to a temporary folder and renamed into place under the
+collection's write lock, which loads also take.
+"""
+import hashlib
+import heapq
+import os
+import re
+import shutil
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from sprint_rag import split_documents
+from sprint_scheduler import INTERACTIVE, SingleFlight, model_key
+
+COLLECTIONS_DIR = "./data/collections"
+NAME_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+
+def slugify(text):
+    """Turn a client/matter label into a safe collection name."""
+    name = re.sub(r"[^a-z0-9_-]+", "-", text.strip().lower()).strip("-_")
+    return name[:64]
+
+
+def validate_name(name):
+    if not NAME_PATTERN.match(name or ""):
+        raise ValueError(f"Invalid collection name: {name!r}")
+    return name
+
+
+def estimate_bytes(vector_store):
+    """Rough in-memory size of a shard: float32 vectors plus chunk text."""
+    index = vector_store.index
+    text = sum(len(doc.page_content) for doc in vector_store.docstore._dict.values())
+    return index.ntotal * index.d * 4 + text
+
+
+def content_hashes(documents):
+    """SHA-256 of each source's page contents, keyed by source path."""
+    by_source = {}
+    for doc in documents:
+        by_source.setdefault(doc.metadata.get("source"), []).append(doc.page_content)
+    return {
+        source: hashlib.sha256("\x00".join(pages).encode("utf-8")).hexdigest()
+        for source, pages in by_source.items()
+    }
+
+
+class CollectionStore:
+    """Manage per-collection FAISS shards and scatter-gather search across them."""
+
+    def __init__(self, embeddings, root=COLLECTIONS_DIR, memory_budget_mb=None,
+                 scheduler=None, max_workers=8):
+        self.embeddings = embeddings
+        self.root = Path(root)
+        if memory_budget_mb is None:
+            memory_budget_mb = int(os.getenv("DOCINTEL_SHARD_BUDGET_MB", "1024"))
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.scheduler = scheduler
+        self._lock = threading.Lock()
+        self._loaded = OrderedDict()
+        self._pins = Counter()
+        self._write_locks = {}
+        self._loading = SingleFlight()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+
+    # ── Layout ────────────────────────────────────────────────────────────
+    def documents_dir(self, name):
+        return self.root / validate_name(name) / "documents"
+
+    def index_dir(self, name):
+        return self.root / validate_name(name) / "faiss_db"
+
+    def exists(self, name):
+        return self.index_dir(name).exists()
+
+    def list_collections(self):
+        if not self.root.exists():
+            return []
+        return sorted(p.parent.name for p in self.root.glob("*/faiss_db"))
+
+    def loaded_collections(self):
+        with self._lock:
+            return list(self._loaded)
+
+    def save_upload(self, name, filename, data):
+        """Write an uploaded file into the collection's own documents folder."""
+        folder = self.documents_dir(name)
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / Path(filename).name
+        with open(path, "wb") as out:
+            out.write(data)
+        return path
+
+    # ── Shard lifecycle ───────────────────────────────────────────────────
+    def load(self, name):
+        """Return the shard for `name`, loading it from disk if needed."""
+        with self._lock:
+            if name in self._loaded:
+                self._loaded.move_to_end(name)
+                return self._loaded[name][0]
+        return self._loading.do(name, lambda: self._load(name))
+
+    def _write_lock(self, name):
+        with self._lock:
+            return self._write_locks.setdefault(name, threading.RLock())
+
+    def _load(self, name):
+        # Under the write lock, so a load never reads a shard mid-swap or
+        # registers an older version over one `add_documents` just registered
+        with self._write_lock(name):
+            with self._lock:
+                entry = self._loaded.get(name)
+            if entry:
+                return entry[0]
+            return self._read(name)
+
+    def _read(self, name):
+        from langchain_community.vectorstores import FAISS
+
+        path = self.index_dir(name)
+        if not path.exists():
+            raise ValueError(f"Unknown collection: {name}")
+        vector_store = FAISS.load_local(
+            str(path), self.embeddings, allow_dangerous_deserialization=True
+        )
+        self._register(name, vector_store)
+        print(f"✅ Loaded shard '{name}'")
+        return vector_store
+
+    def _register(self, name, vector_store):
+        with self._lock:
+            previous = self._loaded.get(name)
+            self._loaded[name] = (vector_store, estimate_bytes(vector_store))
+            self._loaded.move_to_end(name)
+            evicted = self._evict_locked(keep=name)
+        if previous and previous[0] is not vector_store:
+            self._forget(previous[0])
+        self._report_evicted(evicted)
+
+    def _report_evicted(self, evicted):
+        for old_name, old_store in evicted:
+            self._forget(old_store)
+            print(f"♻️ Unloaded shard '{old_name}' (memory budget)")
+
+    def _evict_locked(self, keep=None):
+        evicted = []
+        used = sum(size for _, size in self._loaded.values())
+        for name in list(self._loaded):
+            if used <= self.memory_budget:
+                break
+            if name == keep or self._pins[name]:
+                continue
+            vector_store, size = self._loaded.pop(name)
+            used -= size
+            evicted.append((name, vector_store))
+        return evicted
+
+    def unload(self, name):
+        """Drop a shard from memory. It stays on disk and reloads on next use."""
+        with self._lock:
+            entry = self._loaded.pop(name, None)
+        if entry:
+            self._forget(entry[0])
+
+    def _pin(self, name):
+        """Load a shard and keep it registered until `_unpin`."""
+        while True:
+            vector_store = self.load(name)
+            with self._lock:
+                entry = self._loaded.get(name)
+                if entry and entry[0] is vector_store:
+                    self._pins[name] += 1
+                    return vector_store
+            # Evicted or replaced between load and pin - try again
+
+    def _unpin(self, name):
+        with self._lock:
+            self._pins[name] -= 1
+            if self._pins[name] <= 0:
+                del self._pins[name]
+            evicted = self._evict_locked()
+        self._report_evicted(evicted)
+
+    def _forget(self, vector_store):
+        if self.scheduler:
+            self.scheduler.forget(vector_store)
+
+    def memory_used(self):
+        with self._lock:
+            return sum(size for _, size in self._loaded.values())
+
+    # ── Indexing ──────────────────────────────────────────────────────────
+    def add_documents(self, name, documents):
+        """Chunk, embed and add documents to a collection's shard.
+
+        Sources already indexed with the same content are skipped. A source whose
+        content changed (e.g. a corrected re-upload) has its old chunks replaced.
+        Returns the chunks that were added.
+        """
+        from langchain_community.vectorstores import FAISS
+
+        validate_name(name)
+        with self._write_lock(name):
+            with self._lock:
+                entry = self._loaded.get(name)
+            if entry:
+                current = entry[0]
+            else:
+                current = self._read(name) if self.exists(name) else None
+
+            indexed = {}
+            if current:
+                for doc_id, doc in current.docstore._dict.items():
+                    indexed.setdefault(doc.metadata.get("source"), []).append(
+                        (doc_id, doc.metadata.get("content_hash"))
+                    )
+
+            hashes = content_hashes(documents)
+            changed = {source for source, digest in hashes.items()
+                       if {h for _, h in indexed.get(source, [])} != {digest}}
+            documents = [d for d in documents if d.metadata.get("source") in changed]
+
+            chunks = split_documents(documents)
+            for chunk in chunks:
+                chunk.metadata["collection"] = name
+                chunk.metadata["content_hash"] = hashes[chunk.metadata.get("source")]
+            print(f"✅ Created {len(chunks)} chunks for '{name}'")
+            # Changed sources lose their old chunks even if the new version has no text
+            stale = [doc_id for source in changed for doc_id, _ in indexed.get(source, [])]
+            if not chunks and not stale:
+                return chunks
+
+            # Embed first, then build the updated shard off to the side
+            new_store = None
+            if chunks:
+                new_store = FAISS.from_documents(documents=chunks, embedding=self.embeddings)
+            if current:
+                updated = FAISS.deserialize_from_bytes(
+                    current.serialize_to_bytes(), self.embeddings,
+                    allow_dangerous_deserialization=True
+                )
+                if stale:
+                    updated.delete(stale)
+                    print(f"♻️ Removed {len(stale)} outdated chunks from '{name}'")
+                if new_store:
+                    updated.merge_from(new_store)
+            else:
+                updated = new_store
+
+            self._save(name, updated)
+            self._register(name, updated)
+            print(f"✅ Shard '{name}' saved")
+            return chunks
+
+    def _save(self, name, vector_store):
+        """Write the shard to a temporary folder, then rename it into place."""
+        final = self.index_dir(name)
+        final.parent.mkdir(parents=True, exist_ok=True)
+        suffix = f"{os.getpid()}-{threading.get_ident()}"
+        tmp = final.parent / f".faiss_db.tmp-{suffix}"
+        old = final.parent / f".faiss_db.old-{suffix}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        vector_store.save_local(str(tmp))
+        if final.exists():
+            os.replace(final, old)
+        os.replace(tmp, final)
+        shutil.rmtree(old, ignore_errors=True)
+
+    # ── Search ────────────────────────────────────────────────────────────
+    def search(self, question, names, k=3, priority=INTERACTIVE):
+        """Top-k chunks across the given collections.
+
+        The query is embedded once, each shard is searched in parallel and the
+        hits are merged by distance. All shards share one embedding model, so
+        their distances are directly comparable.
+        """
+        names = sorted({validate_name(n) for n in names})
+        if not names:
+            raise ValueError("Pass at least one collection to search")
+
+        def work():
+            if self.scheduler:
+                vector = self.scheduler.embed_query(self.embeddings, question, priority)
+            else:
+                vector = self.embeddings.embed_query(question)
+
+            if len(names) == 1:
+                hits = self._search_shard(names[0], vector, k, priority)
+            else:
+                futures = [self._pool.submit(self._search_shard, n, vector, k, priority)
+                           for n in names]
+                hits = [hit for f in futures for hit in f.result()]
+            return [doc for doc, _ in heapq.nsmallest(k, hits, key=lambda h: h[1])]
+
+        if self.scheduler:
+            return self.scheduler.flight.do(
+                ("collections", id(self), tuple(names), k, priority, question), work
+            )
+        return work()
+
+    def _search_shard(self, name, vector, k, priority):
+        vector_store = self._pin(name)
+        try:
+            if self.scheduler:
+                return self.scheduler.search(vector_store, vector, k, priority, with_scores=True)
+            return vector_store.similarity_search_with_score_by_vector(vector, k)
+        finally:
+            self._unpin(name)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_store(embeddings, scheduler=None):
+    """Process-wide collection store, so all sessions share the memory budget.
+
+    The store is created on the first call and keeps that call's embeddings
+    and scheduler. Later calls must use the same embedding model and scheduler.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = CollectionStore(embeddings, scheduler=scheduler)
+        if model_key(embeddings) != model_key(_shared.embeddings):
+            raise ValueError(
+                f"Collection store uses {model_key(_shared.embeddings)}, "
+                f"not {model_key(embeddings)}"
+            )
+        if scheduler is not None and scheduler is not _shared.scheduler:
+            raise ValueError("Collection store is already bound to another scheduler")
+        return _shared
@@ -1,25 +1,55 @@
-"""Complete RAG system - FAISS version (stable)."""
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
+"""Complete RAG system - FAISS version (stable).
+
+LangChain and FAISS are imported inside the methods that use them, so importing
+this module (and starting the UI) stays cheap.
+"""
 from pathlib import Path
+from sprint_scheduler import INTERACTIVE
+
+
+def format_docs(docs):
+    return "\n\n".join([
+        f"[Source: {doc.metadata.get('source', 'Unknown')}]\n{doc.page_content}"
+        for doc in docs
+    ])
+
+
+def split_documents(documents):
+    """Split pages into overlapping 1000-character chunks."""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=1000,
+        chunk_overlap=200,
+        separators=["\n\n", "\n", ". ", " ", ""]
+    )
+    return splitter.split_documents(documents)
 
 
 class SimpleRAG:
-    """Minimal RAG system using FAISS."""
+    """Minimal RAG system using FAISS.
 
-    def __init__(self, llm, embeddings):
+    By default every document goes into one global index. Pass a `CollectionStore`
+    and the collection names to search instead, to keep each client/matter in its
+    own shard.
+    """
+
+    def __init__(self, llm, embeddings, scheduler=None, k=3, store=None, collections=None):
         self.llm = llm
         self.embeddings = embeddings
+        self.scheduler = scheduler
+        self.k = k
+        self.store = store
+        self.collections = list(collections or [])
         self.vector_store = None
         self.chain = None
         self.retriever = None
+        self.answer_chain = None
 
     def load_documents(self, folder_path):
         """Load all PDFs from folder."""
+        from langchain_community.document_loaders import PyPDFLoader
+
         docs = []
         pdf_files = list(Path(folder_path).glob("*.pdf"))
         for pdf_file in pdf_files:
@@ -29,15 +59,21 @@ class SimpleRAG:
         print(f"✅ Loaded {len(docs)} pages from {len(pdf_files)} PDFs")
         return docs
 
-    def create_vector_store(self, documents):
-        """Chunk and embed documents."""
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            separators=["\n\n", "\n", ". ", " ", ""]
-        )
-        chunks = splitter.split_documents(documents)
+    def create_vector_store(self, documents, collection=None):
+        """Chunk and embed documents, into `collection` when a store is set."""
+        if self.store:
+            collection = collection or (self.collections[0] if self.collections else None)
+            if not collection:
+                raise ValueError("Pass a collection name when using a CollectionStore")
+            if collection not in self.collections:
+                self.collections.append(collection)
+            return self.store.add_documents(collection, documents)
+
+        from langchain_community.vectorstores import FAISS
+
+        chunks = split_documents(documents)
         print(f"✅ Created {len(chunks)} chunks")
+        self.close()
 
         # Use FAISS instead of ChromaDB
         self.vector_store = FAISS.from_documents(
@@ -52,6 +88,10 @@ class SimpleRAG:
 
     def setup_qa_chain(self):
         """Setup Q&A chain."""
+        from langchain_core.prompts import ChatPromptTemplate
+        from langchain_core.output_parsers import StrOutputParser
+        from langchain_core.runnables import RunnableLambda, RunnablePassthrough
+
         template = """Use ONLY the following context to answer the question.
 If the answer is not in the context, say "I cannot find this in the documents."
 Always mention which document your answer comes from.
@@ -64,33 +104,65 @@ Question: {question}
 Answer:"""
 
         prompt = ChatPromptTemplate.from_template(template)
-        self.retriever = self.vector_store.as_retriever(
-            search_kwargs={"k": 3}
-        )
-
-        def format_docs(docs):
-            return "\n\n".join([
-                f"[Source: {doc.metadata.get('source', 'Unknown')}]\n{doc.page_content}"
-                for doc in docs
-            ])
-
+        if self.store:
+            self.retriever = RunnableLambda(self.retrieve)
+        else:
+            self.retriever = self.vector_store.as_retriever(
+                search_kwargs={"k": self.k}
+            )
+
+        self.answer_chain = prompt | self.llm | StrOutputParser()
         self.chain = (
             {"context": self.retriever | format_docs,
              "question": RunnablePassthrough()}
-            | prompt
-            | self.llm
-            | StrOutputParser()
+            | self.answer_chain
         )
 
         print("✅ Q&A chain ready")
 
-    def ask(self, question):
+    def retrieve(self, question, priority=INTERACTIVE):
+        """Top-k chunks for a question, batched through the scheduler if set."""
+        if self.store:
+            return self.store.search(question, self.collections, self.k, priority)
+        if self.scheduler:
+            return self.scheduler.retrieve(
+                self.embeddings, self.vector_store, question, self.k, priority
+            )
+        return self.retriever.invoke(question)
+
+    def ask(self, question, priority=INTERACTIVE):
         """Ask a question about the documents."""
         if not self.chain:
             raise ValueError("Call setup_qa_chain() first!")
 
-        answer = self.chain.invoke(question)
-        sources = self.retriever.invoke(question)
+        if self.scheduler:
+            return self.scheduler.flight.do(
+                ("ask", self._scope(), priority, question),
+                lambda: self._answer(question, priority)
+            )
+        return self._answer(question, priority)
+
+    def close(self):
+        """Release scheduler batchers bound to this RAG's own index."""
+        if self.scheduler and self.vector_store is not None:
+            self.scheduler.forget(self.vector_store)
+
+    def _scope(self):
+        # Coalescing key - never share answers between different collections
+        if self.store:
+            return (id(self.store), tuple(sorted(self.collections)))
+        return id(self.vector_store)
+
+    def _answer(self, question, priority):
+        # Retrieve once and reuse the chunks for both the prompt and the citations
+        sources = self.retrieve(question, priority)
+        inputs = {"context": format_docs(sources), "question": question}
+        if self.scheduler:
+            answer = self.scheduler.run(
+                "llm", lambda: self.answer_chain.invoke(inputs), priority, self.llm
+            )
+        else:
+            answer = self.answer_chain.invoke(inputs)
 
         return {
             "answer": answer,
@@ -0,0 +1,297 @@
+"""Shared scheduler for concurrent queries - single-flight, micro-batching, priorities."""
+import heapq
+import itertools
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+
+INTERACTIVE = 0
+BATCH = 10
+
+
+class SingleFlight:
+    """Coalesce identical in-flight calls so only one does the work."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+        return future.result()
+
+
+class PriorityLimiter:
+    """Cap concurrent calls to one model, admitting lower priority values first."""
+
+    def __init__(self, max_concurrency):
+        self.max_concurrency = max_concurrency
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = []
+        self._counter = itertools.count()
+
+    def acquire(self, priority=INTERACTIVE):
+        with self._cond:
+            ticket = (priority, next(self._counter))
+            heapq.heappush(self._waiting, ticket)
+            while self._waiting[0] != ticket or self._active >= self.max_concurrency:
+                self._cond.wait()
+            heapq.heappop(self._waiting)
+            self._active += 1
+            self._cond.notify_all()
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def run(self, fn, priority=INTERACTIVE):
+        self.acquire(priority)
+        try:
+            return fn()
+        finally:
+            self.release()
+
+
+class MicroBatcher:
+    """Collect items for up to `window_ms` (or `max_batch` items) and process them in one call.
+
+    `batch_fn` takes a list of items and returns a list of results in the same order.
+    Pending items are dispatched in priority order, so interactive requests never
+    sit behind a full batch of background work.
+    """
+
+    def __init__(self, batch_fn, window_ms=10, max_batch=16, limiter=None):
+        self.batch_fn = batch_fn
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.limiter = limiter
+        self._cond = threading.Condition()
+        self._pending = []
+        self._counter = itertools.count()
+        self._closed = False
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def submit(self, item, priority=INTERACTIVE):
+        future = Future()
+        with self._cond:
+            closed = self._closed
+            if not closed:
+                heapq.heappush(self._pending, (priority, next(self._counter), item, future))
+                self._cond.notify()
+        if closed:
+            # Late submit after close - serve it alone, still under the model's cap
+            return self._call([item], priority)[0]
+        return future.result()
+
+    def _call(self, items, priority):
+        if self.limiter:
+            return self.limiter.run(lambda: self.batch_fn(items), priority)
+        return self.batch_fn(items)
+
+    def close(self):
+        """Flush pending items without waiting for the window, then stop the worker."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    if self._closed:
+                        return
+                    self._cond.wait()
+                deadline = time.monotonic() + self.window
+                while len(self._pending) < self.max_batch and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                size = min(self.max_batch, len(self._pending))
+                batch = [heapq.heappop(self._pending) for _ in range(size)]
+
+            priority = batch[0][0]
+            items = [entry[2] for entry in batch]
+            futures = [entry[3] for entry in batch]
+            try:
+                results = self._call(items, priority)
+                for future, result in zip(futures, results):
+                    future.set_result(result)
+            except BaseException as e:
+                for future in futures:
+                    future.set_exception(e)
+
+
+def faiss_search_batch(vector_store, vectors, k, with_scores=False):
+    """Run one FAISS search for several query vectors on a LangChain FAISS store.
+
+    With `with_scores`, each hit is a (doc, distance) pair - lower is closer.
+    """
+    import numpy as np
+
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if getattr(vector_store, "_normalize_L2", False):
+        import faiss
+        faiss.normalize_L2(matrix)
+
+    distances, indices = vector_store.index.search(matrix, k)
+    results = []
+    for row_distances, row in zip(distances, indices):
+        docs = []
+        for distance, i in zip(row_distances, row):
+            if i == -1:
+                continue
+            doc = vector_store.docstore.search(vector_store.index_to_docstore_id[i])
+            docs.append((doc, float(distance)) if with_scores else doc)
+        results.append(docs)
+    return results
+
+
+# Embedding models whose Bedrock API takes a list of texts in one request.
+# Titan v1 embeds one text per call, so batching it would only serialise queries.
+BATCH_EMBEDDING_MODELS = ("cohere.embed",)
+
+
+def model_key(model):
+    """Batchers are shared per model ID, not per client object."""
+    return getattr(model, "model_id", None) or id(model)
+
+
+class QueryScheduler:
+    """One scheduler shared by every SimpleRAG / MultiAgentSystem in the process.
+
+    - identical in-flight questions are computed once (single-flight)
+    - query embeddings are micro-batched into one `embed_documents` call when the
+      model takes batch input, otherwise each query is its own concurrent call
+    - FAISS searches are micro-batched into one `index.search` per store
+    - each model (by model ID) has its own concurrency cap; INTERACTIVE runs ahead of BATCH
+
+    Single-flight keys include the priority, so an interactive caller never
+    waits behind an identical background request.
+    """
+
+    def __init__(self, window_ms=10, max_batch=16, llm_concurrency=4, embedding_concurrency=8):
+        self.window_ms = window_ms
+        self.max_batch = max_batch
+        self.flight = SingleFlight()
+        self.concurrency = {"llm": llm_concurrency, "embeddings": embedding_concurrency}
+        self.limiters = {}
+        self._lock = threading.Lock()
+        self._batchers = {}
+
+    def limiter(self, kind, model=None):
+        """Concurrency limiter for one model of `kind` ("llm" or "embeddings")."""
+        key = (kind, model_key(model) if model is not None else None)
+        with self._lock:
+            limiter = self.limiters.get(key)
+            if limiter is None:
+                limiter = PriorityLimiter(self.concurrency[kind])
+                self.limiters[key] = limiter
+            return limiter
+
+    def _batcher(self, key, batch_fn, limiter=None):
+        with self._lock:
+            batcher = self._batchers.get(key)
+            if batcher is None:
+                batcher = MicroBatcher(batch_fn, self.window_ms, self.max_batch, limiter)
+                self._batchers[key] = batcher
+            return batcher
+
+    def _drop(self, key, batcher):
+        with self._lock:
+            if self._batchers.get(key) is batcher:
+                del self._batchers[key]
+        batcher.close()
+
+    def batches_embeddings(self, embeddings):
+        return str(getattr(embeddings, "model_id", "")).startswith(BATCH_EMBEDDING_MODELS)
+
+    def embed_query(self, embeddings, text, priority=INTERACTIVE):
+        """Embed one query, batched with other concurrent queries when the model allows it."""
+        key = model_key(embeddings)
+
+        def work():
+            if self.batches_embeddings(embeddings):
+                batcher = self._batcher(
+                    ("embed", key), embeddings.embed_documents,
+                    self.limiter("embeddings", embeddings)
+                )
+                return batcher.submit(text, priority)
+            return self.run("embeddings", lambda: embeddings.embed_query(text), priority, embeddings)
+
+        return self.flight.do(("embed", key, priority, text), work)
+
+    def search(self, vector_store, vector, k=3, priority=INTERACTIVE, with_scores=False):
+        """Search one vector, batched with other concurrent searches on the same store.
+
+        The batcher only holds a weak reference to the store, and is closed when
+        the store is garbage collected or passed to `forget`.
+        """
+        key = ("search", id(vector_store), k, with_scores)
+        with self._lock:
+            batcher = self._batchers.get(key)
+        if batcher is None:
+            store_ref = weakref.ref(vector_store)
+
+            def batch_fn(vectors):
+                store = store_ref()
+                if store is None:
+                    raise RuntimeError("Vector store was released during search")
+                return faiss_search_batch(store, vectors, k, with_scores)
+
+            batcher = self._batcher(key, batch_fn)
+            weakref.finalize(vector_store, self._drop, key, batcher)
+        return batcher.submit(vector, priority)
+
+    def forget(self, vector_store):
+        """Drop the batchers bound to a store so it can be freed."""
+        with self._lock:
+            keys = [key for key in self._batchers
+                    if key[0] == "search" and key[1] == id(vector_store)]
+            batchers = [self._batchers.pop(key) for key in keys]
+        for batcher in batchers:
+            batcher.close()
+
+    def retrieve(self, embeddings, vector_store, question, k=3, priority=INTERACTIVE):
+        """Embed + search, coalescing identical in-flight questions."""
+        def work():
+            vector = self.embed_query(embeddings, question, priority)
+            return self.search(vector_store, vector, k, priority)
+        return self.flight.do(("retrieve", id(vector_store), k, priority, question), work)
+
+    def run(self, kind, fn, priority=INTERACTIVE, model=None):
+        """Run `fn` under the concurrency cap of `model`, a model of `kind` ("llm" or "embeddings")."""
+        return self.limiter(kind, model).run(fn, priority)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Process-wide scheduler, so all sessions share batching and limits."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = QueryScheduler()
+        return _shared
@@ -0,0 +1,180 @@
+"""Cold-start helpers - background pre-warming and an import-time profile report."""
+import ast
+import re
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent
+
+# Project modules should stay cheap - heavy libraries are imported on first use
+APP_MODULES = [
+    "sprint_bedrock",
+    "sprint_scheduler",
+    "sprint_rag",
+    "sprint_agents",
+    "sprint_collections",
+    "sprint_startup",
+]
+
+HEAVY_MODULES = [
+    "boto3",
+    "langchain_aws",
+    "langchain_core.prompts",
+    "langchain_community.document_loaders",
+    "langchain_community.vectorstores",
+    "langchain_text_splitters",
+    "langgraph.graph",
+    "faiss",
+]
+
+_prewarm_thread = None
+_prewarm_lock = threading.Lock()
+
+
+def _warm(modules):
+    import importlib
+
+    t0 = time.perf_counter()
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"⚠️ Pre-warm skipped {name}: {e}")
+    try:
+        from sprint_bedrock import get_client
+        get_client()
+    except Exception as e:
+        print(f"⚠️ Pre-warm could not create Bedrock client: {e}")
+    print(f"✅ Pre-warm finished in {time.perf_counter() - t0:.2f}s")
+
+
+def prewarm(modules=None):
+    """Import heavy dependencies and open the Bedrock client in a background thread.
+
+    Safe to call on every Streamlit rerun - the work only starts once per process.
+    """
+    global _prewarm_thread
+    with _prewarm_lock:
+        if _prewarm_thread is None:
+            _prewarm_thread = threading.Thread(
+                target=_warm, args=(modules or HEAVY_MODULES,), daemon=True
+            )
+            _prewarm_thread.start()
+        return _prewarm_thread
+
+
+def script_imports(script, lazy=True, _seen=None):
+    """Modules a project script imports, following imports of other project modules.
+
+    With `lazy=False` only module-level imports count - what runs as soon as the
+    script is imported. With `lazy=True` imports inside functions and blocks count
+    too - what the script has imported once it has done its work.
+    """
+    seen = _seen if _seen is not None else set()
+    path = APP_DIR / script
+    seen.add(path.stem)
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    nodes = ast.walk(tree) if lazy else tree.body
+
+    modules = []
+    for node in nodes:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            top = name.split(".")[0]
+            if (APP_DIR / f"{top}.py").exists():
+                if top not in seen:
+                    modules += [top] + script_imports(f"{top}.py", lazy, seen)
+            elif name not in modules:
+                modules.append(name)
+    return list(dict.fromkeys(modules))
+
+
+def entry_points():
+    """(label, code) for each real entry point, derived from the scripts themselves."""
+    def target(label, script, lazy, include_self=False):
+        # The Streamlit script itself renders UI on import, so only its imports are measured
+        modules = script_imports(script, lazy)
+        if include_self:
+            modules.insert(0, Path(script).stem)
+        return (label, "import " + ", ".join(modules))
+
+    return [
+        target("ui: start", "sprint_app_final.py", lazy=False),
+        target("ui: first Process click", "sprint_app_final.py", lazy=True),
+    ] + [
+        target(f"cli: python {script}", script, lazy=True, include_self=True)
+        for script in ("sprint_bedrock.py", "sprint_rag.py", "sprint_agents.py")
+    ]
+
+
+IMPORT_ROW = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+
+def _import_rows(code):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=APP_DIR
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = IMPORT_ROW.match(line)
+        if m:
+            depth = (len(m.group(3)) - 1) // 2
+            rows.append((int(m.group(2)) / 1e6, m.group(4), depth))
+    error = None
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines()
+        error = lines[-1] if lines else f"exit code {proc.returncode}"
+    return rows, error
+
+
+def profile_imports(targets=None, top=15):
+    """Measure cold import time of each target in a fresh interpreter (`-X importtime`).
+
+    `targets` is a list of (label, code); by default the real entry points
+    followed by every project and heavy module. A target's total is the sum of
+    all top-level imports it triggers - parent packages and dependencies
+    included - minus what the interpreter already imports at startup.
+
+    Returns a list of (label, total_seconds, slowest_modules, error).
+    """
+    if targets is None:
+        targets = entry_points() + [(name, f"import {name}") for name in APP_MODULES + HEAVY_MODULES]
+
+    baseline_rows, _ = _import_rows("pass")
+    baseline = {name for _, name, _ in baseline_rows}
+
+    report = []
+    for label, code in targets:
+        rows, error = _import_rows(code)
+        rows = [r for r in rows if r[1] not in baseline]
+        if error:
+            report.append((label, None, [], error))
+            continue
+        total = sum(seconds for seconds, _, depth in rows if depth == 0)
+        slowest = sorted(((seconds, name) for seconds, name, _ in rows), reverse=True)[:top]
+        report.append((label, total, slowest, None))
+    return report
+
+
+def print_report(report):
+    print("\n⏱️  Import-time profile (cold, fresh interpreter per target)\n")
+    for label, total, slowest, error in report:
+        if total is None:
+            print(f"  {label:<40} failed: {error}")
+            continue
+        print(f"  {label:<40} {total:6.2f}s")
+        for seconds, name in slowest[:3]:
+            print(f"      {name:<36} {seconds:6.2f}s")
+
+
+if __name__ == "__main__":
+    print_report(profile_imports())
@@ -0,0 +1,263 @@
+"""CollectionStore tests with stub shards - no AWS or FAISS needed."""
+import json
+import sys
+import threading
+import time
+import types
+import uuid
+from pathlib import Path
+
+import pytest
+
+import sprint_collections
+import sprint_scheduler
+from sprint_scheduler import BATCH, INTERACTIVE, QueryScheduler
+from sprint_collections import CollectionStore, content_hashes, get_store, slugify
+
+
+class Doc:
+    def __init__(self, text, source="a.pdf"):
+        self.page_content = text
+        self.metadata = {"source": source}
+
+
+class Shard:
+    def __init__(self, hits):
+        self.hits = hits
+        self.index = types.SimpleNamespace(ntotal=len(hits), d=4)
+        self.docstore = types.SimpleNamespace(_dict={i: doc for i, (doc, _) in enumerate(hits)})
+
+    def similarity_search_with_score_by_vector(self, vector, k):
+        return self.hits[:k]
+
+
+class Embeddings:
+    model_id = "amazon.titan-embed-text-v1"
+
+    def embed_query(self, text):
+        return [0.0] * 4
+
+
+def make_store(budget_mb=1024):
+    return CollectionStore(Embeddings(), root="/nonexistent", memory_budget_mb=budget_mb)
+
+
+def test_search_merges_top_k_across_shards():
+    store = make_store()
+    store._register("a", Shard([(Doc("a1"), 0.1), (Doc("a2"), 0.5)]))
+    store._register("b", Shard([(Doc("b1"), 0.2), (Doc("b2"), 0.3)]))
+
+    docs = store.search("q", ["a", "b"], k=3)
+    assert [d.page_content for d in docs] == ["a1", "b1", "b2"]
+
+
+def test_search_only_touches_given_collections():
+    store = make_store()
+    store._register("a", Shard([(Doc("a1"), 0.1)]))
+    store._register("b", Shard([(Doc("b1"), 0.0)]))
+
+    assert [d.page_content for d in store.search("q", ["a"], k=3)] == ["a1"]
+
+
+def test_invalid_names_are_rejected():
+    store = make_store()
+    for name in ["../x", "", "A B"]:
+        with pytest.raises(ValueError):
+            store.search("q", [name])
+    assert slugify("  Acme Corp / 2024 MSA ") == "acme-corp-2024-msa"
+    assert slugify("!!!") == ""
+
+
+def test_lru_shard_is_evicted_over_budget():
+    store = make_store(budget_mb=0)
+    store._register("a", Shard([(Doc("a1"), 0.1)]))
+    store._register("b", Shard([(Doc("b1"), 0.1)]))
+    assert store.loaded_collections() == ["b"]
+
+
+def test_pinned_shard_is_not_evicted():
+    store = make_store(budget_mb=0)
+    store._register("a", Shard([(Doc("a1"), 0.1)]))
+    store._pin("a")
+    store._register("b", Shard([(Doc("b1"), 0.1)]))
+    assert "a" in store.loaded_collections()
+
+    store._unpin("a")
+    assert "a" not in store.loaded_collections()
+
+
+def test_content_hash_changes_with_content():
+    before = content_hashes([Doc("page 1"), Doc("page 2")])
+    after = content_hashes([Doc("page 1"), Doc("page 2 corrected")])
+    assert before["a.pdf"] != after["a.pdf"]
+    assert before == content_hashes([Doc("page 1"), Doc("page 2")])
+
+
+def test_get_store_rejects_a_different_model(monkeypatch):
+    monkeypatch.setattr(sprint_collections, "_shared", None)
+    first = get_store(Embeddings())
+    assert get_store(Embeddings()) is first
+
+    other = Embeddings()
+    other.model_id = "cohere.embed-english-v3"
+    with pytest.raises(ValueError):
+        get_store(other)
+
+
+# ── add_documents with a stub FAISS ───────────────────────────────────────
+class StubFAISS:
+    """Just enough of LangChain's FAISS: documents keyed by id, no vectors."""
+
+    def __init__(self, docs):
+        self.docstore = types.SimpleNamespace(_dict=dict(docs))
+
+    @property
+    def index(self):
+        return types.SimpleNamespace(ntotal=len(self.docstore._dict), d=4)
+
+    @classmethod
+    def from_documents(cls, documents, embedding):
+        return cls({uuid.uuid4().hex: doc for doc in documents})
+
+    def serialize_to_bytes(self):
+        return json.dumps(self._rows())
+
+    @classmethod
+    def deserialize_from_bytes(cls, data, embeddings, allow_dangerous_deserialization=False):
+        return cls(cls._docs(json.loads(data)))
+
+    def delete(self, ids):
+        for doc_id in ids:
+            del self.docstore._dict[doc_id]
+
+    def merge_from(self, other):
+        self.docstore._dict.update(other.docstore._dict)
+
+    def save_local(self, path):
+        Path(path).mkdir(parents=True)
+        (Path(path) / "index.json").write_text(json.dumps(self._rows()))
+
+    @classmethod
+    def load_local(cls, path, embeddings, allow_dangerous_deserialization=False):
+        return cls(cls._docs(json.loads((Path(path) / "index.json").read_text())))
+
+    def similarity_search_with_score_by_vector(self, vector, k):
+        return [(doc, 0.0) for doc in list(self.docstore._dict.values())[:k]]
+
+    def _rows(self):
+        return [[i, d.page_content, d.metadata] for i, d in self.docstore._dict.items()]
+
+    @staticmethod
+    def _docs(rows):
+        docs = {}
+        for doc_id, text, metadata in rows:
+            docs[doc_id] = Doc(text)
+            docs[doc_id].metadata = metadata
+        return docs
+
+
+@pytest.fixture
+def faiss_store(tmp_path, monkeypatch):
+    vectorstores = types.ModuleType("langchain_community.vectorstores")
+    vectorstores.FAISS = StubFAISS
+    monkeypatch.setitem(sys.modules, "langchain_community", types.ModuleType("langchain_community"))
+    monkeypatch.setitem(sys.modules, "langchain_community.vectorstores", vectorstores)
+
+    def split(documents):
+        chunks = []
+        for doc in documents:
+            if doc.page_content.strip():
+                chunk = Doc(doc.page_content)
+                chunk.metadata = dict(doc.metadata)
+                chunks.append(chunk)
+        return chunks
+
+    monkeypatch.setattr(sprint_collections, "split_documents", split)
+    return CollectionStore(Embeddings(), root=tmp_path)
+
+
+def texts(vector_store):
+    return sorted(d.page_content for d in vector_store.docstore._dict.values())
+
+
+def test_add_documents_skips_unchanged_sources(faiss_store):
+    docs = [Doc("v1", "a.pdf"), Doc("other", "b.pdf")]
+    assert len(faiss_store.add_documents("m", docs)) == 2
+    before = faiss_store.load("m")
+
+    assert faiss_store.add_documents("m", [Doc("v1", "a.pdf"), Doc("other", "b.pdf")]) == []
+    assert faiss_store.load("m") is before
+    assert texts(before) == ["other", "v1"]
+
+
+def test_add_documents_replaces_changed_source_without_mutating_shard(faiss_store):
+    faiss_store.add_documents("m", [Doc("v1", "a.pdf"), Doc("other", "b.pdf")])
+    old = faiss_store.load("m")
+    old_docs = dict(old.docstore._dict)
+
+    chunks = faiss_store.add_documents("m", [Doc("v2", "a.pdf"), Doc("other", "b.pdf")])
+    assert [c.page_content for c in chunks] == ["v2"]
+
+    new = faiss_store.load("m")
+    assert new is not old
+    assert old.docstore._dict == old_docs
+    assert texts(new) == ["other", "v2"]
+
+    collection_dir = faiss_store.index_dir("m").parent
+    assert sorted(p.name for p in collection_dir.iterdir()) == ["faiss_db"]
+
+
+def test_changed_source_without_text_drops_old_chunks(faiss_store):
+    faiss_store.add_documents("m", [Doc("v1", "a.pdf"), Doc("other", "b.pdf")])
+
+    assert faiss_store.add_documents("m", [Doc("", "a.pdf"), Doc("other", "b.pdf")]) == []
+    assert texts(faiss_store.load("m")) == ["other"]
+
+
+def test_unloaded_shard_reloads_latest_version(faiss_store):
+    faiss_store.add_documents("m", [Doc("v1", "a.pdf")])
+    faiss_store.add_documents("m", [Doc("v2", "a.pdf")])
+    faiss_store.unload("m")
+    assert texts(faiss_store.load("m")) == ["v2"]
+
+
+# ── Priorities through the scheduler ─────────────────────────────────────
+def test_interactive_search_does_not_wait_behind_identical_batch_search(monkeypatch):
+    monkeypatch.setattr(
+        sprint_scheduler, "faiss_search_batch",
+        lambda store, vectors, k, with_scores=False: [
+            store.similarity_search_with_score_by_vector(v, k) for v in vectors
+        ]
+    )
+    gate = threading.Event()
+    calls = []
+
+    class BlockingEmbeddings(Embeddings):
+        def embed_query(self, text):
+            calls.append(text)
+            if len(calls) == 1:
+                gate.wait(5)
+            return [0.0] * 4
+
+    store = CollectionStore(BlockingEmbeddings(), root="/nonexistent",
+                            scheduler=QueryScheduler())
+    store._register("m", Shard([(Doc("hit"), 0.1)]))
+
+    background = threading.Thread(target=store.search, args=("same", ["m"], 3, BATCH))
+    background.start()
+    deadline = time.monotonic() + 5
+    while not calls and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    results = []
+    interactive = threading.Thread(
+        target=lambda: results.append(store.search("same", ["m"], 3, INTERACTIVE))
+    )
+    interactive.start()
+    interactive.join(5)
+    try:
+        assert [d.page_content for d in results[0]] == ["hit"]
+        assert background.is_alive()
+    finally:
+        gate.set()
+        background.join(5)
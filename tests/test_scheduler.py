@@ -0,0 +1,335 @@
+"""Scheduler tests with stub embeddings and stores - no AWS or FAISS needed.
+
+Tests synchronise on events, barriers and observed state rather than wall-clock
+timing, so they stay stable on a loaded machine.
+"""
+import gc
+import threading
+import time
+
+import pytest
+
+import sprint_scheduler
+from sprint_scheduler import (
+    BATCH, INTERACTIVE, MicroBatcher, PriorityLimiter, QueryScheduler, SingleFlight
+)
+
+TIMEOUT = 5
+
+
+def wait_until(predicate, timeout=TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.001)
+
+
+def waiters(future):
+    """Threads blocked on `future.result()`."""
+    return len(future._condition._waiters)
+
+
+def start(fn, *args):
+    thread = threading.Thread(target=fn, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+def run_threads(fns):
+    results = [None] * len(fns)
+
+    def call(i, fn):
+        results[i] = fn()
+
+    threads = [start(call, i, fn) for i, fn in enumerate(fns)]
+    for t in threads:
+        t.join(TIMEOUT)
+    return results
+
+
+class GatedEmbeddings:
+    """Titan-like stub: one call per text. Calls block until `gate` is set."""
+
+    def __init__(self, model_id="amazon.titan-embed-text-v1"):
+        self.model_id = model_id
+        self.gate = threading.Event()
+        self.gate.set()
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def _enter(self, texts):
+        with self._lock:
+            self.calls.append(list(texts))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        self.gate.wait(TIMEOUT)
+        with self._lock:
+            self.active -= 1
+
+    def embed_query(self, text):
+        self._enter([text])
+        return [float(len(text))]
+
+    def embed_documents(self, texts):
+        self._enter(texts)
+        return [[float(len(t))] for t in texts]
+
+
+class Store:
+    pass
+
+
+# ── SingleFlight ──────────────────────────────────────────────────────────
+def test_single_flight_coalesces_identical_calls():
+    flight = SingleFlight()
+    gate = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        gate.wait(TIMEOUT)
+        return 42
+
+    results = []
+    leader = start(lambda: results.append(flight.do("k", work)))
+    wait_until(lambda: calls)
+    followers = [start(lambda: results.append(flight.do("k", work))) for _ in range(4)]
+    wait_until(lambda: waiters(flight._calls["k"]) == 4)
+    gate.set()
+    for t in [leader] + followers:
+        t.join(TIMEOUT)
+
+    assert results == [42] * 5
+    assert len(calls) == 1
+
+
+def test_single_flight_propagates_errors_to_followers():
+    flight = SingleFlight()
+    gate = threading.Event()
+    errors = []
+
+    def work():
+        gate.wait(TIMEOUT)
+        raise RuntimeError("boom")
+
+    def call():
+        try:
+            flight.do("k", work)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [start(call)]
+    wait_until(lambda: "k" in flight._calls)
+    threads += [start(call) for _ in range(2)]
+    wait_until(lambda: waiters(flight._calls["k"]) == 2)
+    gate.set()
+    for t in threads:
+        t.join(TIMEOUT)
+    assert errors == ["boom"] * 3
+
+
+# ── PriorityLimiter ───────────────────────────────────────────────────────
+def test_limiter_admits_interactive_before_batch():
+    limiter = PriorityLimiter(1)
+    order = []
+    limiter.acquire()
+
+    batch = start(limiter.run, lambda: order.append("batch"), BATCH)
+    wait_until(lambda: len(limiter._waiting) == 1)
+    interactive = start(limiter.run, lambda: order.append("interactive"), INTERACTIVE)
+    wait_until(lambda: len(limiter._waiting) == 2)
+
+    limiter.release()
+    batch.join(TIMEOUT)
+    interactive.join(TIMEOUT)
+    assert order == ["interactive", "batch"]
+
+
+def test_limiter_respects_cap():
+    limiter = PriorityLimiter(2)
+    embeddings = GatedEmbeddings()
+    embeddings.gate.clear()
+
+    threads = [start(limiter.run, lambda: embeddings.embed_query("q")) for _ in range(6)]
+    wait_until(lambda: embeddings.active == 2 and len(limiter._waiting) == 4)
+    embeddings.gate.set()
+    for t in threads:
+        t.join(TIMEOUT)
+    assert embeddings.peak == 2
+    assert len(embeddings.calls) == 6
+
+
+# ── MicroBatcher ──────────────────────────────────────────────────────────
+def test_micro_batcher_splits_at_max_batch():
+    sizes = []
+
+    def batch_fn(items):
+        sizes.append(len(items))
+        return [i * 2 for i in items]
+
+    # A long window: batches only go out when full, or when closed
+    batcher = MicroBatcher(batch_fn, window_ms=60_000, max_batch=2)
+    results = [None] * 5
+
+    def call(i):
+        results[i] = batcher.submit(i)
+
+    threads = [start(call, i) for i in range(5)]
+    wait_until(lambda: sum(r is not None for r in results) == 4)
+    batcher.close()
+    for t in threads:
+        t.join(TIMEOUT)
+
+    assert results == [0, 2, 4, 6, 8]
+    assert sizes == [2, 2, 1]
+
+
+def test_micro_batcher_error_reaches_every_item():
+    def batch_fn(items):
+        raise ValueError("bad batch")
+
+    batcher = MicroBatcher(batch_fn, window_ms=60_000, max_batch=3)
+    errors = []
+
+    def call():
+        with pytest.raises(ValueError, match="bad batch"):
+            batcher.submit("x")
+        errors.append(1)
+
+    run_threads([call] * 3)
+    assert len(errors) == 3
+    batcher.close()
+
+
+def test_micro_batcher_close_serves_pending_items():
+    release = threading.Event()
+    started = threading.Event()
+
+    def batch_fn(items):
+        started.set()
+        release.wait(TIMEOUT)
+        return [i + 1 for i in items]
+
+    batcher = MicroBatcher(batch_fn, window_ms=1, max_batch=1)
+    results = [None] * 3
+
+    def call(i):
+        results[i] = batcher.submit(i)
+
+    threads = [start(call, 0)]
+    started.wait(TIMEOUT)
+    threads += [start(call, i) for i in (1, 2)]
+    wait_until(lambda: len(batcher._pending) == 2)
+    batcher.close()
+    release.set()
+    for t in threads:
+        t.join(TIMEOUT)
+
+    assert results == [1, 2, 3]
+    batcher._thread.join(TIMEOUT)
+    assert not batcher._thread.is_alive()
+
+
+def test_closed_batcher_serves_late_submits_under_limiter():
+    limiter = PriorityLimiter(1)
+    batcher = MicroBatcher(lambda items: [i + 1 for i in items], limiter=limiter)
+    batcher.close()
+
+    limiter.acquire()
+    late = []
+    thread = start(lambda: late.append(batcher.submit(9)))
+    wait_until(lambda: len(limiter._waiting) == 1)
+    assert late == []
+    # The batcher lock is not held while waiting for the limiter
+    with batcher._cond:
+        pass
+
+    limiter.release()
+    thread.join(TIMEOUT)
+    assert late == [10]
+
+
+# ── QueryScheduler ────────────────────────────────────────────────────────
+def test_unbatched_model_embeds_queries_concurrently():
+    scheduler = QueryScheduler(embedding_concurrency=8)
+    embeddings = GatedEmbeddings()
+    embeddings.gate.clear()
+
+    threads = [start(scheduler.embed_query, embeddings, f"q{i}") for i in range(8)]
+    wait_until(lambda: embeddings.active == 8)
+    embeddings.gate.set()
+    for t in threads:
+        t.join(TIMEOUT)
+
+    assert embeddings.peak == 8
+    assert all(len(c) == 1 for c in embeddings.calls)
+    assert not scheduler._batchers
+
+
+def test_limiters_are_per_model():
+    scheduler = QueryScheduler(embedding_concurrency=1)
+    titan = GatedEmbeddings()
+    other = GatedEmbeddings(model_id="amazon.titan-embed-text-v2:0")
+    titan.gate.clear()
+
+    blocked = start(scheduler.embed_query, titan, "a")
+    wait_until(lambda: titan.active == 1)
+    # Titan's only slot is taken; another model still gets its own
+    assert scheduler.embed_query(other, "b") == [1.0]
+
+    titan.gate.set()
+    blocked.join(TIMEOUT)
+    assert scheduler.limiter("embeddings", titan) is not scheduler.limiter("embeddings", other)
+
+
+def test_batch_model_shares_batcher_across_instances():
+    scheduler = QueryScheduler(window_ms=60_000, max_batch=2)
+    first = GatedEmbeddings(model_id="cohere.embed-english-v3")
+    second = GatedEmbeddings(model_id="cohere.embed-english-v3")
+
+    results = run_threads([
+        lambda: scheduler.embed_query(first, "a"),
+        lambda: scheduler.embed_query(second, "bb"),
+    ])
+    assert results == [[1.0], [2.0]]
+    assert len(scheduler._batchers) == 1
+    assert [len(c) for c in first.calls + second.calls] == [2]
+
+
+def test_interactive_query_never_waits_behind_identical_batch_query():
+    scheduler = QueryScheduler()
+    embeddings = GatedEmbeddings()
+    embeddings.gate.clear()
+
+    background = start(scheduler.embed_query, embeddings, "same", BATCH)
+    wait_until(lambda: embeddings.active == 1)
+
+    # Separate key: the interactive call runs its own embedding
+    interactive = start(scheduler.embed_query, embeddings, "same", INTERACTIVE)
+    wait_until(lambda: embeddings.active == 2)
+
+    embeddings.gate.set()
+    background.join(TIMEOUT)
+    interactive.join(TIMEOUT)
+    assert len(embeddings.calls) == 2
+
+
+def test_search_batchers_are_released(monkeypatch):
+    monkeypatch.setattr(
+        sprint_scheduler, "faiss_search_batch",
+        lambda store, vectors, k, with_scores=False: [["hit"] for _ in vectors]
+    )
+    scheduler = QueryScheduler()
+
+    kept, dropped = Store(), Store()
+    assert scheduler.search(kept, [0.0]) == ["hit"]
+    assert scheduler.search(dropped, [0.0]) == ["hit"]
+    assert len(scheduler._batchers) == 2
+
+    scheduler.forget(kept)
+    del dropped
+    gc.collect()
+    assert not scheduler._batchers
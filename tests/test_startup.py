@@ -0,0 +1,97 @@
+"""Client registry, pre-warming and import profile tests - boto3 and dotenv are stubbed."""
+import sys
+import threading
+import types
+
+import pytest
+
+import sprint_bedrock
+import sprint_startup
+
+
+@pytest.fixture
+def stub_aws(monkeypatch):
+    created, env_loads = [], []
+
+    def client(service, region_name=None, config=None):
+        created.append((service, region_name))
+        return object()
+
+    botocore = types.ModuleType("botocore")
+    botocore_config = types.ModuleType("botocore.config")
+    botocore_config.Config = lambda **kwargs: kwargs
+    monkeypatch.setitem(sys.modules, "boto3", types.SimpleNamespace(client=client))
+    monkeypatch.setitem(sys.modules, "botocore", botocore)
+    monkeypatch.setitem(sys.modules, "botocore.config", botocore_config)
+    monkeypatch.setitem(
+        sys.modules, "dotenv", types.SimpleNamespace(load_dotenv=lambda: env_loads.append(1))
+    )
+    monkeypatch.setattr(sprint_bedrock, "_clients", {})
+    monkeypatch.setattr(sprint_bedrock, "_env_loaded", False)
+    monkeypatch.delenv("AWS_REGION", raising=False)
+    return created, env_loads
+
+
+def test_get_client_is_shared_across_threads(stub_aws):
+    created, _ = stub_aws
+    barrier = threading.Barrier(8)
+    clients = []
+
+    def call():
+        barrier.wait(5)
+        clients.append(sprint_bedrock.get_client())
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+
+    assert len(clients) == 8
+    assert all(c is clients[0] for c in clients)
+    assert created == [("bedrock-runtime", "us-east-1")]
+
+
+def test_get_client_is_per_service_and_region(stub_aws):
+    created, _ = stub_aws
+    a = sprint_bedrock.get_client(region="us-east-1")
+    b = sprint_bedrock.get_client(region="eu-west-2")
+    assert a is not b
+    assert sprint_bedrock.get_client(region="eu-west-2") is b
+    assert len(created) == 2
+
+
+def test_load_env_runs_once(stub_aws):
+    _, env_loads = stub_aws
+    sprint_bedrock.load_env()
+    sprint_bedrock.load_env()
+    sprint_bedrock.get_client()
+    assert env_loads == [1]
+
+
+def test_prewarm_starts_one_thread(monkeypatch):
+    gate = threading.Event()
+    runs = []
+
+    def warm(modules):
+        runs.append(modules)
+        gate.wait(5)
+
+    monkeypatch.setattr(sprint_startup, "_warm", warm)
+    monkeypatch.setattr(sprint_startup, "_prewarm_thread", None)
+
+    threads = {sprint_startup.prewarm() for _ in range(3)}
+    gate.set()
+    (thread,) = threads
+    thread.join(5)
+    assert len(runs) == 1
+
+
+def test_ui_start_profile_follows_app_imports():
+    modules = sprint_startup.script_imports("sprint_app_final.py", lazy=False)
+    for name in ["streamlit", "sprint_startup", "sprint_bedrock",
+                 "sprint_collections", "sprint_rag", "sprint_scheduler"]:
+        assert name in modules
+    # Heavy libraries are only imported lazily
+    assert "langchain_aws" not in modules
+    assert "langchain_aws" in sprint_startup.script_imports("sprint_app_final.py", lazy=True)